@@ -1,10 +1,22 @@
 import os
+import sys
+import io
+import csv
+import gzip
+import zipfile
 import time
 import random
 import re
 import json
+import hashlib
 import logging
+import cProfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
 from yt_dlp import YoutubeDL
@@ -17,8 +29,16 @@ load_dotenv()
 
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger("clip2text")
+logger.setLevel(logging.INFO)
 
 GROQ_KEY = os.getenv("GROQ_KEY") or os.getenv("GROQ_API_KEY") or ""
+GROQ_MODEL = "llama-3.1-8b-instant"
+
+# USD per 1M tokens (input, output) - used for the dashboard cost estimate
+MODEL_PRICING = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
 
 # ============================================================
 # ✅ Permanent History (JSON file)
@@ -56,6 +76,294 @@ def delete_history_item(index: int):
         pass
 
 
+# ============================================================
+# 📦 Bulk export / import (streamed, one record at a time)
+# ============================================================
+# Served by Streamlit's static file route (server.enableStaticServing in .streamlit/config.toml),
+# which streams the file in chunks instead of holding it in the session like st.download_button
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+EXPORT_URL = "app/static/exports"
+EXPORT_TTL = 24 * 3600  # exports left behind by closed sessions are dropped after this
+EXPORT_MAX_BYTES = 200 * 1024 * 1024  # Streamlit's static route returns 404 for larger files
+EXPORT_FIELDS = ["ts", "title", "channel", "url", "style", "lang", "subs_type", "time_taken", "summary", "transcript"]
+EXPORT_FORMATS = {
+    "JSONL": ".jsonl",
+    "JSONL (gzip)": ".jsonl.gz",
+    "CSV": ".csv",
+    "CSV (gzip)": ".csv.gz",
+    "ZIP archive (JSONL)": ".zip",
+}
+
+
+def filter_history(items, date_from=None, date_to=None, channels=None, styles=None):
+    """Yield history items matching the filters (dates are inclusive)."""
+    for item in items:
+        day = (item.get("ts") or "")[:10]
+        if date_from and day < date_from.isoformat():
+            continue
+        if date_to and day > date_to.isoformat():
+            continue
+        if channels and item.get("channel", "") not in channels:
+            continue
+        if styles and item.get("style", "") not in styles:
+            continue
+        yield item
+
+
+def iter_jsonl(items):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def iter_csv(items):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for item in items:
+        writer.writerow(item)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+    yield buf.getvalue()  # header only, when nothing matched
+
+
+def write_export(items, fmt: str, session_token: str) -> str:
+    """Stream items into an export file on disk and return its path.
+
+    Only this session's previous export (same token) is replaced; other
+    sessions' files are left alone until they expire.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    own_prefix = f"clip2text_history_{session_token}_"
+    cutoff = time.time() - EXPORT_TTL
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if name.startswith(own_prefix) or os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except Exception:
+            pass
+
+    ext = EXPORT_FORMATS[fmt]
+    path = os.path.join(EXPORT_DIR, f"{own_prefix}{time.strftime('%Y%m%d-%H%M%S')}{ext}")
+    chunks = iter_csv(items) if fmt.startswith("CSV") else iter_jsonl(items)
+
+    if ext == ".zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            with zf.open("clip2text_history.jsonl", "w") as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+    elif ext.endswith(".gz"):
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return path
+
+
+def _raise_csv_field_limit():
+    # default is 131072 chars, less than one long lecture transcript
+    limit = sys.maxsize
+    while True:
+        try:
+            csv.field_size_limit(limit)
+            return
+        except OverflowError:  # C long is 32-bit on some platforms
+            limit //= 10
+
+
+def _iter_records(name: str, text):
+    if name.endswith(".csv"):
+        _raise_csv_field_limit()
+        for row in csv.DictReader(text):
+            try:
+                row["time_taken"] = float(row.get("time_taken") or 0)
+            except ValueError:
+                row["time_taken"] = 0.0
+            yield row
+        return
+
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def iter_import(name: str, fileobj):
+    """Yield records from an exported .jsonl/.csv (optionally .gz) or .zip file."""
+    name = name.lower()
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as zf:
+            for member in zf.namelist():
+                if member.lower().endswith((".jsonl", ".csv")):
+                    with zf.open(member) as raw:
+                        yield from _iter_records(member.lower(), io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+        return
+
+    if name.endswith(".gz"):
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+        name = name[:-3]
+    yield from _iter_records(name, io.TextIOWrapper(fileobj, encoding="utf-8", newline=""))
+
+
+def _history_key(item: dict) -> tuple:
+    # older entries have no "style" and CSV turns missing values into "", so normalise both
+    return (item.get("url") or "", item.get("ts") or "", item.get("style") or "")
+
+
+def import_history(records, history_list) -> tuple:
+    """Append records not already in history. Returns (added, skipped).
+
+    All records are read before history is touched, so a file that fails
+    halfway (bad zip, truncated gzip, ...) imports nothing.
+    """
+    seen = {_history_key(h) for h in history_list}
+    new_items, skipped = [], 0
+    for record in records:
+        key = _history_key(record)
+        if key in seen or not record.get("summary"):
+            skipped += 1
+            continue
+        seen.add(key)
+        new_items.append({k: record.get(k, "") for k in EXPORT_FIELDS})
+    if new_items:
+        history_list.extend(new_items)
+        save_history(history_list)
+    return len(new_items), skipped
+
+
+# ============================================================
+# 💾 Stage checkpoints (resume failed runs)
+# ============================================================
+CHECKPOINT_DIR = "clip2text_checkpoints"
+CHECKPOINT_TTL = 24 * 3600  # incomplete runs older than this are dropped
+
+
+def make_run_id(yt_url: str, lang: str) -> str:
+    """Same video + caption language -> same run ID, so a retry finds its checkpoint."""
+    key = f"{get_yt_id(yt_url) or yt_url.strip()}|{lang}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _checkpoint_path(run_id: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{run_id}.json")
+
+
+def load_checkpoint(run_id: str) -> dict:
+    """Load saved stages for a run ({} when nothing was saved)."""
+    path = _checkpoint_path(run_id)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+    return {}
+
+
+def save_checkpoint(run_id: str, **stages):
+    """Merge completed stages into the run's checkpoint (atomic write)."""
+    data = load_checkpoint(run_id)
+    data.update(stages)
+    data["updated"] = time.time()
+    try:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp = _checkpoint_path(run_id) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, _checkpoint_path(run_id))
+    except Exception:
+        pass
+
+
+def clear_checkpoint(run_id: str):
+    try:
+        os.remove(_checkpoint_path(run_id))
+    except Exception:
+        pass
+
+
+def gc_checkpoints(max_age: float = CHECKPOINT_TTL):
+    """Remove checkpoints of runs that were never completed."""
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(CHECKPOINT_DIR):
+        path = os.path.join(CHECKPOINT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except Exception:
+            pass
+
+
+# ============================================================
+# 📊 LLM usage telemetry (JSONL file)
+# ============================================================
+METRICS_FILE = "clip2text_llm_metrics.jsonl"
+_metrics_lock = threading.Lock()  # chapter mode records from worker threads
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+def record_llm_call(model: str, style: str, transcript_chars: int, latency,
+                    usage=None, cache_hit: bool = False, error: str = ""):
+    """Append one LLM call (successful or failed) to the metrics file.
+
+    Cache hits pass latency=None so they stay out of the latency stats.
+    """
+    prompt_tokens = (getattr(usage, "prompt_tokens", 0) or 0) if usage is not None else 0
+    completion_tokens = (getattr(usage, "completion_tokens", 0) or 0) if usage is not None else 0
+    row = {
+        "ts": time.time(),
+        "model": model,
+        "style": style,
+        "transcript_chars": transcript_chars,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "queue_time": (getattr(usage, "queue_time", 0) or 0) if usage is not None else 0,
+        "latency": latency,
+        "cache_hit": cache_hit,
+        "error": error,
+        "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens),
+    }
+    try:
+        with _metrics_lock, open(METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+    except Exception:
+        pass
+
+
+def load_llm_metrics() -> pd.DataFrame:
+    """Load the metrics file, skipping any corrupt lines."""
+    rows = []
+    if os.path.exists(METRICS_FILE):
+        try:
+            with open(METRICS_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except Exception:
+            pass
+    return pd.DataFrame(rows)
+
+
 # ============================================================
 # UI logger
 # ============================================================
@@ -66,6 +374,134 @@ def ui_log(box, msg: str):
         box.code("\n".join(st.session_state.logs[-35:]), language="bash")
 
 
+# ============================================================
+# 🔬 Tracing + profiling (opt-in via env vars)
+# ============================================================
+# CLIP2TEXT_TRACE=1    -> write one OTLP/JSON ExportTraceServiceRequest per line to CLIP2TEXT_TRACE_FILE
+# CLIP2TEXT_PROFILE=1  -> dump a cProfile .prof file per run into CLIP2TEXT_PROFILE_DIR
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+TRACE_ENABLED = _env_flag("CLIP2TEXT_TRACE")
+TRACE_FILE = os.getenv("CLIP2TEXT_TRACE_FILE", "clip2text_traces.jsonl")
+PROFILE_ENABLED = _env_flag("CLIP2TEXT_PROFILE")
+PROFILE_DIR = os.getenv("CLIP2TEXT_PROFILE_DIR", "clip2text_profiles")
+
+_current_span = contextvars.ContextVar("clip2text_span", default=None)
+_trace_lock = threading.Lock()
+
+
+def _otlp_value(value):
+    # OTLP/JSON encodes int64 as a string
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def export_span(span: dict):
+    """Append a finished span as one OTLP/JSON ExportTraceServiceRequest line
+    (readable by e.g. the collector's otlpjsonfile receiver)."""
+    otlp_span = {
+        "traceId": span["trace_id"],
+        "spanId": span["span_id"],
+        "parentSpanId": span["parent_id"],
+        "name": span["name"],
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span["start"]),
+        "endTimeUnixNano": str(span["end"]),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span["attrs"].items()],
+        "status": span["status"],
+    }
+    record = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "clip2text"}}]},
+            "scopeSpans": [{"scope": {"name": "clip2text"}, "spans": [otlp_span]}],
+        }]
+    }
+    try:
+        with _trace_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
+
+@contextmanager
+def trace_span(name: str, **attrs):
+    """Time a block as a span. Yields the attribute dict so callers can add to it."""
+    if not TRACE_ENABLED:
+        yield dict(attrs)
+        return
+
+    parent = _current_span.get()
+    span = {
+        "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+        "span_id": os.urandom(8).hex(),
+        "parent_id": parent["span_id"] if parent else "",
+        "name": name,
+        "attrs": dict(attrs),
+        "status": {"code": 1},  # STATUS_CODE_OK
+        "start": time.time_ns(),
+    }
+    token = _current_span.set(span)
+    try:
+        yield span["attrs"]
+    except BaseException as e:
+        # st.stop() is a BaseException too, and we only hit it on failed runs
+        span["status"] = {"code": 2, "message": f"{type(e).__name__}: {e}"}
+        raise
+    finally:
+        _current_span.reset(token)
+        span["end"] = time.time_ns()
+        export_span(span)
+
+
+def trace_set(**attrs):
+    """Add attributes to the innermost open span (no-op when tracing is off)."""
+    span = _current_span.get()
+    if span is not None:
+        span["attrs"].update(attrs)
+
+
+@contextmanager
+def profile_run(label: str):
+    """Dump a cProfile file for the wrapped block when CLIP2TEXT_PROFILE is on.
+
+    cProfile only sees the calling thread: chapter-mode Groq calls run on pool
+    threads and show up as time spent waiting in the main thread, not as their
+    own frames (their spans in the trace file cover them instead).
+    """
+    if not PROFILE_ENABLED:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ allows one active profiler per process (e.g. two sessions at once)
+        logger.warning("cProfile skipped for %s: %s", label, e)
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            safe = re.sub(r"[^A-Za-z0-9_-]", "_", label or "run")
+            path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{safe}.prof")
+            profiler.dump_stats(path)
+            logger.info("cProfile written to %s", path)
+        except Exception:
+            logger.exception("Could not write cProfile for %s", label)
+
+
 # ============================================================
 #  YouTube helpers (thumbnail preview)
 # ============================================================
@@ -109,17 +545,47 @@ def clean_transcript(text: str) -> str:
     return "\n".join(cleaned)
 
 
-def json3_to_text(json3_text: str) -> str:
+def json3_to_segments(json3_text: str) -> list:
+    """[(start_seconds, text), ...] from a json3 caption file."""
     data = json.loads(json3_text)
-    lines = []
+    segments = []
     for event in data.get("events", []):
         segs = event.get("segs")
         if not segs:
             continue
         txt = "".join(seg.get("utf8", "") for seg in segs).replace("\n", " ").strip()
         if txt:
-            lines.append(txt)
-    return "\n".join(lines)
+            segments.append((event.get("tStartMs", 0) / 1000, txt))
+    return segments
+
+
+def json3_to_text(json3_text: str) -> str:
+    return "\n".join(txt for _, txt in json3_to_segments(json3_text))
+
+
+def _vtt_seconds(stamp: str) -> float:
+    parts = stamp.replace(",", ".").split(":")
+    secs = 0.0
+    for part in parts:
+        secs = secs * 60 + float(part)
+    return secs
+
+
+def vtt_to_segments(vtt_text: str) -> list:
+    """[(start_seconds, text), ...] from a WEBVTT caption file."""
+    segments, start = [], None
+    for line in vtt_text.splitlines():
+        line = line.strip()
+        if "-->" in line:
+            start = _vtt_seconds(line.split("-->")[0].strip())
+            continue
+        if not line:
+            start = None
+            continue
+        if start is None or re.fullmatch(r"\[.*?\]", line):
+            continue
+        segments.append((start, re.sub(r"<[^>]+>", "", line)))
+    return segments
 
 
 # ============================================================
@@ -136,6 +602,7 @@ def fetch_with_retry(url: str, tries: int = 8, log_box=None) -> str:
     })
 
     for attempt in range(tries):
+        trace_set(retries=attempt)
         r = session.get(url, timeout=30)
 
         if r.status_code == 200:
@@ -166,50 +633,63 @@ def pick_best_subtitles(info):
 
 
 def extract_transcript(yt_url: str, prefer_lang="en", log_box=None):
-    ui_log(log_box, "🔎 Extracting video metadata...")
-    ydl_opts = {"quiet": True, "no_warnings": True, "skip_download": True}
-
-    with YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(yt_url, download=False)
-
-    title = info.get("title", "Unknown")
-    channel = info.get("uploader", "Unknown")
-
-    subs, subs_type = pick_best_subtitles(info)
-    if not subs:
-        raise RuntimeError("No captions/subtitles available for this video.")
-
-    lang = prefer_lang if prefer_lang in subs else list(subs.keys())[0]
-    ui_log(log_box, f" Captions found ({subs_type}) | Language: {lang}")
-
-    chosen = subs[lang]
-
-    # prefer json3
-    sub_url = None
-    sub_ext = None
-    for entry in chosen:
-        if entry.get("ext") == "json3":
-            sub_url = entry["url"]
-            sub_ext = "json3"
-            break
-
-    if not sub_url:
-        sub_url = chosen[0]["url"]
-        sub_ext = chosen[0].get("ext", "vtt")
-
-    ui_log(log_box, "📥 Fetching captions...")
-    raw = fetch_with_retry(sub_url, log_box=log_box)
-
-    if "fmt=json3" in sub_url or sub_ext == "json3":
-        transcript = json3_to_text(raw)
-    else:
-        transcript = raw
+    with trace_span("extract_transcript", video_id=get_yt_id(yt_url) or "", prefer_lang=prefer_lang) as span:
+        ui_log(log_box, "🔎 Extracting video metadata...")
+        ydl_opts = {"quiet": True, "no_warnings": True, "skip_download": True}
+
+        with trace_span("yt_dlp.extract_info"):
+            with YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(yt_url, download=False)
+
+        title = info.get("title", "Unknown")
+        channel = info.get("uploader", "Unknown")
+
+        subs, subs_type = pick_best_subtitles(info)
+        if not subs:
+            raise RuntimeError("No captions/subtitles available for this video.")
+
+        lang = prefer_lang if prefer_lang in subs else list(subs.keys())[0]
+        ui_log(log_box, f" Captions found ({subs_type}) | Language: {lang}")
+
+        chosen = subs[lang]
+
+        # prefer json3
+        sub_url = None
+        sub_ext = None
+        for entry in chosen:
+            if entry.get("ext") == "json3":
+                sub_url = entry["url"]
+                sub_ext = "json3"
+                break
+
+        if not sub_url:
+            sub_url = chosen[0]["url"]
+            sub_ext = chosen[0].get("ext", "vtt")
+
+        ui_log(log_box, "📥 Fetching captions...")
+        with trace_span("fetch_captions", ext=sub_ext) as fetch_span:
+            raw = fetch_with_retry(sub_url, log_box=log_box)
+            fetch_span["bytes"] = len(raw)
+
+        with trace_span("parse_captions", ext=sub_ext) as parse_span:
+            if "fmt=json3" in sub_url or sub_ext == "json3":
+                segments = json3_to_segments(raw)
+                transcript = "\n".join(txt for _, txt in segments)
+            else:
+                segments = vtt_to_segments(raw)
+                transcript = raw
+            parse_span["transcript_chars"] = len(transcript)
+
+        span.update(lang=lang, subs_type=subs_type, transcript_chars=len(transcript))
 
     return {
         "title": title,
         "channel": channel,
+        "video_id": info.get("id") or get_yt_id(yt_url),
         "lang": lang,
         "subs_type": subs_type,
+        "chapters": info.get("chapters") or [],
+        "segments": segments,
         "raw_transcript": transcript
     }
 
@@ -217,21 +697,9 @@ def extract_transcript(yt_url: str, prefer_lang="en", log_box=None):
 # ============================================================
 # ✨ Summarize with Groq
 # ============================================================
-def summarize_with_groq(transcript: str, title: str, style: str, log_box=None) -> str:
-    ui_log(log_box, "🧠 Generating summary...")
-
-    transcript = (transcript or "").strip()
-
-    #  limit transcript
-    if len(transcript) > 14000:
-        ui_log(log_box, f"✂️ Transcript too long ({len(transcript)} chars). Cutting to 14,000 chars.")
-        transcript = transcript[:14000]
-
-    client = Groq(api_key=GROQ_KEY)
-
-    # Different instruction for each style (THIS makes output change)
-    style_prompts = {
-        "Short & crisp": """
+# Different instruction for each style (THIS makes output change)
+STYLE_PROMPTS = {
+    "Short & crisp": """
 Write a very short summary.
 Rules:
 - MAX 6 lines total
@@ -239,7 +707,7 @@ Rules:
 - MAX 3 takeaways
 - Keep it punchy & simple.
 """,
-        "Detailed notes": """
+    "Detailed notes": """
 Write detailed structured notes.
 Rules:
 - Use headings and subpoints
@@ -247,20 +715,20 @@ Rules:
 - Include a mini conclusion at end
 - Make it longer and richer than normal.
 """,
-        "Study notes (structured)": """
+    "Study notes (structured)": """
 Create study notes for students.
 Rules:
 - Use sections: Overview, Concepts, Definitions, Examples, Common Mistakes, Quick Revision
 - Add 5 practice questions at end (with short answers).
 """,
-        "Job interview takeaways": """
+    "Job interview takeaways": """
 Write output for job interview preparation.
 Rules:
 - Extract skills, tools, frameworks mentioned
 - Add 7 interview questions based on content
 - Provide STAR-format answers (short)
 """,
-        "Executive brief": """
+    "Executive brief": """
 Write like an executive briefing memo.
 Rules:
 - Start with Decision Summary (3 bullet)
@@ -269,9 +737,53 @@ Rules:
 - Recommendations (actionable)
 - Keep tone professional.
 """,
-    }
+}
+
+
+def run_groq(prompt: str, style: str, transcript_chars: int, span_name: str = "summarize_with_groq",
+             **span_attrs) -> str:
+    """One chat completion, traced and recorded in the metrics file."""
+    client = Groq(api_key=GROQ_KEY)
+    with trace_span(span_name, style=style, model=GROQ_MODEL,
+                    transcript_chars=transcript_chars, **span_attrs) as span:
+        res, error = None, ""
+        t_call = time.perf_counter()
+        try:
+            res = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.45,
+                max_tokens=22000,
+            )
+        except Exception as e:
+            # timeouts / 429s / quota errors are the tail we want on the dashboard
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            latency = time.perf_counter() - t_call
+            record_llm_call(GROQ_MODEL, style, transcript_chars, latency,
+                            usage=getattr(res, "usage", None), error=error)
+        usage = getattr(res, "usage", None)
+        if usage is not None:
+            span.update(
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            )
+    return res.choices[0].message.content.strip()
+
+
+def summarize_with_groq(transcript: str, title: str, style: str, log_box=None) -> str:
+    ui_log(log_box, "🧠 Generating summary...")
+
+    transcript = (transcript or "").strip()
+    transcript_chars = len(transcript)
+
+    #  limit transcript
+    if len(transcript) > 14000:
+        ui_log(log_box, f"✂️ Transcript too long ({len(transcript)} chars). Cutting to 14,000 chars.")
+        transcript = transcript[:14000]
 
-    style_instruction = style_prompts.get(style, style_prompts["Short & crisp"])
+    style_instruction = STYLE_PROMPTS.get(style, STYLE_PROMPTS["Short & crisp"])
 
     prompt = f"""
 You are an expert YouTube transcript summarizer.
@@ -289,15 +801,165 @@ Transcript:
 """
 
     ui_log(log_box, "⚡ Running model...")
-    res = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.45,
-        max_tokens=22000,
-    )
+    summary = run_groq(prompt, style, transcript_chars)
 
     ui_log(log_box, " Summary ready.")
-    return res.choices[0].message.content.strip()
+    return summary
+
+
+# ============================================================
+# 📚 Chapter mode (parallel per-chapter summaries)
+# ============================================================
+CHAPTER_WORKERS = 4
+CHAPTER_MAX_CHARS = 14000
+CHAPTER_CACHE_DIR = "clip2text_chapter_cache"  # one file per chapter summary
+CHAPTER_CACHE_TTL = 30 * 24 * 3600  # entries not read or written for this long are evicted
+
+
+def _chapter_cache_path(key: str) -> str:
+    return os.path.join(CHAPTER_CACHE_DIR, f"{key}.md")
+
+
+def get_cached_chapter(key: str):
+    """Cached summary for a chapter key, or None. A hit refreshes the entry's age."""
+    path = _chapter_cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = f.read()
+        os.utime(path)
+        return summary
+    except Exception:
+        return None
+
+
+def put_cached_chapter(key: str, summary: str):
+    """Write one chapter summary (atomic write)."""
+    try:
+        os.makedirs(CHAPTER_CACHE_DIR, exist_ok=True)
+        tmp = f"{_chapter_cache_path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(summary)
+        os.replace(tmp, _chapter_cache_path(key))
+    except Exception:
+        pass
+
+
+def gc_chapter_cache(max_age: float = CHAPTER_CACHE_TTL):
+    """Evict chapter summaries that haven't been used recently."""
+    if not os.path.isdir(CHAPTER_CACHE_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(CHAPTER_CACHE_DIR):
+        path = os.path.join(CHAPTER_CACHE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except Exception:
+            pass
+
+
+def chapter_cache_key(chapter: dict, video_title: str, style: str) -> str:
+    key = f"{GROQ_MODEL}|{style}|{video_title}|{chapter['title']}|{chapter['text']}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def format_ts(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, sec = divmod(rem, 60)
+    return f"{h}:{m:02d}:{sec:02d}" if h else f"{m}:{sec:02d}"
+
+
+def split_by_chapters(segments, chapters) -> list:
+    """Group timestamped caption lines by yt-dlp chapter boundaries."""
+    out = []
+    for i, ch in enumerate(chapters):
+        start = float(ch.get("start_time") or 0)
+        end = ch.get("end_time")
+        end = float(end) if end is not None else float("inf")
+        text = clean_transcript("\n".join(txt for t, txt in segments if start <= t < end))
+        if text:
+            out.append({"title": ch.get("title") or f"Chapter {i + 1}", "start": start, "text": text})
+    return out
+
+
+def summarize_chapter(chapter: dict, video_title: str, style: str) -> str:
+    # same cap as the full-transcript path; summarize_chapters logs which chapters get cut
+    text = chapter["text"][:CHAPTER_MAX_CHARS]
+    style_instruction = STYLE_PROMPTS.get(style, STYLE_PROMPTS["Short & crisp"])
+
+    prompt = f"""
+You are an expert YouTube transcript summarizer.
+
+Video Title: {video_title}
+Chapter: {chapter["title"]}
+Selected Style: {style}
+
+You are summarizing ONE chapter of the video. Do not repeat the chapter title as a heading.
+
+IMPORTANT: follow the style rules below exactly:
+{style_instruction}
+
+Output must be clearly formatted using Markdown.
+
+Chapter transcript:
+{text}
+"""
+    return run_groq(prompt, style, len(chapter["text"]), span_name="summarize_chapter",
+                    chapter=chapter["title"], truncated=len(chapter["text"]) > CHAPTER_MAX_CHARS)
+
+
+def summarize_chapters(chapters: list, video_title: str, video_id: str, style: str, log_box=None) -> str:
+    """Summarize chapters concurrently; cached chapters are reused, not regenerated."""
+    ui_log(log_box, "🧠 Generating chapter summaries...")
+    results = [None] * len(chapters)
+    todo = []
+    for i, ch in enumerate(chapters):
+        key = chapter_cache_key(ch, video_title, style)
+        cached = get_cached_chapter(key)
+        if cached is not None:
+            results[i] = cached
+            # no model call happened, so there is no latency to report
+            record_llm_call(GROQ_MODEL, style, len(ch["text"]), None, cache_hit=True)
+        else:
+            todo.append((i, key))
+
+    ui_log(log_box, f"📚 {len(chapters)} chapters | {len(chapters) - len(todo)} cached | {len(todo)} to summarize")
+
+    for i, _ in todo:
+        if len(chapters[i]["text"]) > CHAPTER_MAX_CHARS:
+            ui_log(log_box, f"✂️ [{format_ts(chapters[i]['start'])}] {chapters[i]['title']} too long "
+                            f"({len(chapters[i]['text'])} chars). Cutting to 14,000 chars.")
+
+    errors = []
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(CHAPTER_WORKERS, len(todo))) as pool:
+            # copy the context per task so worker spans nest under the current trace
+            futures = {
+                pool.submit(contextvars.copy_context().run, summarize_chapter, chapters[i], video_title, style): (i, key)
+                for i, key in todo
+            }
+            for fut in as_completed(futures):
+                i, key = futures[fut]
+                try:
+                    results[i] = fut.result()
+                    # cache as each chapter lands, so a retry only redoes the failed ones
+                    put_cached_chapter(key, results[i])
+                    ui_log(log_box, f"   ✅ [{format_ts(chapters[i]['start'])}] {chapters[i]['title']}")
+                except Exception as e:
+                    errors.append(e)
+                    ui_log(log_box, f"   ❌ [{format_ts(chapters[i]['start'])}] {chapters[i]['title']}: {e}")
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {len(chapters)} chapters failed: {errors[0]}")
+
+    parts = []
+    for ch, text in zip(chapters, results):
+        link = f"https://www.youtube.com/watch?v={video_id}&t={int(ch['start'])}s"
+        parts.append(f"## [{format_ts(ch['start'])}]({link}) {ch['title']}\n\n{text}")
+
+    ui_log(log_box, " Summary ready.")
+    return "\n\n---\n\n".join(parts)
 
 
 # ============================================================
@@ -316,6 +978,8 @@ if "logs" not in st.session_state:
 # ✅ history states
 if "history" not in st.session_state:
     st.session_state.history = load_history()
+    gc_checkpoints()
+    gc_chapter_cache()
 
 if "page" not in st.session_state:
     st.session_state.page = "summarize"
@@ -333,6 +997,16 @@ def go_new():
     st.session_state.logs = []
 
 
+def go_dashboard():
+    st.session_state.page = "dashboard"
+    st.session_state.active_item = None
+
+
+def go_export():
+    st.session_state.page = "export"
+    st.session_state.active_item = None
+
+
 def open_history(idx):
     st.session_state.page = "view"
     st.session_state.active_item = idx
@@ -364,6 +1038,10 @@ with st.sidebar:
     st.markdown('<div class="sidebar-btn">', unsafe_allow_html=True)
     if st.button("➕ New", use_container_width=True):
         go_new()
+    if st.button("📊 Dashboard", use_container_width=True):
+        go_dashboard()
+    if st.button("📦 Export / Import", use_container_width=True):
+        go_export()
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("---")
@@ -411,6 +1089,167 @@ footer {visibility: hidden;}
 """, unsafe_allow_html=True)
 
 
+# ============================================================
+# 📊 LLM DASHBOARD PAGE
+# ============================================================
+if st.session_state.page == "dashboard":
+    st.markdown("## 📊 LLM Usage Dashboard")
+    st.caption("Latency, throughput and token spend per summary style")
+
+    metrics = load_llm_metrics()
+
+    if metrics.empty:
+        st.info("No LLM calls recorded yet.\n\nGenerate 1 summary and it appears here ✅")
+    else:
+        metrics["when"] = pd.to_datetime(metrics["ts"], unit="s")
+        if "error" not in metrics:
+            metrics["error"] = ""  # rows written before errors were recorded
+        metrics["failed"] = metrics["error"].fillna("").astype(str) != ""
+        metrics["cache_hit"] = metrics["cache_hit"].fillna(False).astype(bool)
+        # latency/throughput only describe real model calls (older rows logged cache hits as 0.0s)
+        metrics["latency"] = pd.to_numeric(metrics["latency"], errors="coerce").where(~metrics["cache_hit"])
+        ok_latency = metrics["latency"].where((metrics["latency"] > 0) & ~metrics["failed"])
+        metrics["tokens_per_sec"] = metrics["completion_tokens"] / ok_latency
+        # cache hits are logged rows but not model calls: keep them out of call counts and rates
+        metrics["model_call"] = ~metrics["cache_hit"]
+        metrics["failed_call"] = metrics["failed"].astype(float).where(metrics["model_call"])
+        metrics["call_cost_usd"] = metrics["cost_usd"].where(metrics["model_call"])
+        metrics["call_prompt_tokens"] = metrics["prompt_tokens"].where(metrics["model_call"])
+        metrics["call_completion_tokens"] = metrics["completion_tokens"].where(metrics["model_call"])
+
+        f1, f2 = st.columns(2)
+        with f1:
+            all_styles = sorted(metrics["style"].dropna().unique())
+            picked_styles = st.multiselect("Styles", all_styles, default=all_styles)
+        with f2:
+            all_models = sorted(metrics["model"].dropna().unique())
+            picked_models = st.multiselect("Models", all_models, default=all_models)
+
+        metrics = metrics[metrics["style"].isin(picked_styles) & metrics["model"].isin(picked_models)]
+
+        if metrics.empty:
+            st.info("No calls match these filters.")
+        else:
+            k1, k2, k3, k4, k5 = st.columns(5)
+            k1.metric("LLM calls", int(metrics["model_call"].sum()))
+            k2.metric("Total tokens", int(metrics["prompt_tokens"].sum() + metrics["completion_tokens"].sum()))
+            k3.metric("Total cost", f"${metrics['cost_usd'].sum():.4f}")
+            k4.metric("Cache hits", f"{int(metrics['cache_hit'].sum())} ({metrics['cache_hit'].mean() * 100:.0f}%)")
+            error_rate = metrics["failed_call"].mean()
+            k5.metric("Error rate", f"{error_rate * 100:.1f}%" if pd.notna(error_rate) else "–")
+
+            st.markdown("### ⏱️ Per style")
+            per_style = metrics.groupby(["style", "model"]).agg(
+                calls=("model_call", "sum"),
+                cache_hits=("cache_hit", "sum"),
+                error_rate=("failed_call", "mean"),
+                p50_latency=("latency", lambda x: x.quantile(0.50)),
+                p95_latency=("latency", lambda x: x.quantile(0.95)),
+                p99_latency=("latency", lambda x: x.quantile(0.99)),
+                avg_queue_time=("queue_time", "mean"),
+                tokens_per_sec=("tokens_per_sec", "mean"),
+                avg_prompt_tokens=("call_prompt_tokens", "mean"),
+                avg_completion_tokens=("call_completion_tokens", "mean"),
+                cost_per_call=("call_cost_usd", "mean"),
+                total_cost=("cost_usd", "sum"),
+            )
+            st.dataframe(per_style.round(4), use_container_width=True)
+
+            by_day = metrics.groupby([metrics["when"].dt.date, "style"])
+
+            st.markdown("### 📈 p95 latency over time (s)")
+            st.line_chart(by_day["latency"].quantile(0.95).unstack())
+
+            st.markdown("### ⚠️ Error rate over time")
+            st.line_chart(by_day["failed_call"].mean().unstack())
+
+            failed = metrics[metrics["failed"]]
+            if not failed.empty:
+                st.markdown("### 🧯 Recent errors")
+                st.dataframe(failed.sort_values("ts", ascending=False)[["when", "style", "model", "latency", "error"]].head(20),
+                             use_container_width=True)
+
+            st.markdown("### 💸 Cost over time (USD)")
+            st.bar_chart(by_day["cost_usd"].sum().unstack())
+
+            st.markdown("### 📏 Latency vs transcript length")
+            st.scatter_chart(metrics.dropna(subset=["latency"]), x="transcript_chars", y="latency", color="style")
+
+    if st.button("⬅️ Back to summarizer"):
+        go_new()
+
+    st.stop()
+
+
+# ============================================================
+# 📦 EXPORT / IMPORT PAGE
+# ============================================================
+if st.session_state.page == "export":
+    st.markdown("## 📦 Bulk Export / Import")
+    st.caption("Exports are streamed to disk record by record. Downloads are capped at 200 MB per file, "
+               "so use a gzip or ZIP format for large histories")
+
+    history_all = st.session_state.history
+
+    st.markdown("### ⬆️ Export")
+    e1, e2 = st.columns(2)
+    with e1:
+        date_from = st.date_input("From date", value=None)
+        all_channels = sorted({h.get("channel", "") for h in history_all if h.get("channel")})
+        picked_channels = st.multiselect("Channels", all_channels)
+    with e2:
+        date_to = st.date_input("To date", value=None)
+        all_styles = sorted({h.get("style", "") for h in history_all if h.get("style")})
+        picked_styles = st.multiselect("Styles", all_styles)
+
+    export_fmt = st.selectbox("Format", list(EXPORT_FORMATS.keys()))
+
+    filters = dict(date_from=date_from, date_to=date_to, channels=picked_channels, styles=picked_styles)
+    matched = sum(1 for _ in filter_history(history_all, **filters))
+    st.caption(f"{matched} of {len(history_all)} saved items match")
+
+    if "export_token" not in st.session_state:
+        st.session_state.export_token = os.urandom(8).hex()
+
+    # build only on click, so the payload isn't regenerated on every rerun
+    if st.button("📦 Prepare export", disabled=matched == 0):
+        with st.spinner("Writing export..."):
+            st.session_state.export_path = write_export(
+                filter_history(history_all, **filters), export_fmt, st.session_state.export_token
+            )
+
+    # a plain link to the static route: the browser downloads it in chunks, nothing is read here
+    export_path = st.session_state.get("export_path")
+    if export_path and os.path.exists(export_path):
+        name = os.path.basename(export_path)
+        size_mb = os.path.getsize(export_path) / (1024 * 1024)
+        if os.path.getsize(export_path) > EXPORT_MAX_BYTES:
+            st.error(f"❌ {name} is {size_mb:.0f} MB, over the 200 MB download limit. "
+                     "Pick a gzip or ZIP format, or narrow the date/channel/style filters.")
+        else:
+            st.markdown(
+                f'<a href="{EXPORT_URL}/{name}" download="{name}" style="display:inline-block; padding:.6rem 1.6rem; '
+                f'border-radius:14px; border:1px solid rgba(255,255,255,.16); font-weight:900; text-decoration:none;">'
+                f'⬇️ Download {name} ({size_mb:.1f} MB)</a>',
+                unsafe_allow_html=True,
+            )
+
+    st.markdown("---")
+    st.markdown("### ⬇️ Import")
+    uploaded = st.file_uploader("Exported file", type=["jsonl", "csv", "gz", "zip"])
+    if uploaded is not None and st.button("📥 Import into history"):
+        try:
+            added, skipped = import_history(iter_import(uploaded.name, uploaded), st.session_state.history)
+            st.success(f"✅ Imported {added} items ({skipped} duplicates/empty skipped)")
+        except Exception as e:
+            st.error(f"❌ Import failed: {e}")
+
+    if st.button("⬅️ Back to summarizer"):
+        go_new()
+
+    st.stop()
+
+
 # ============================================================
 # ✅ VIEW HISTORY PAGE
 # ============================================================
@@ -615,11 +1454,13 @@ with st.form("premium_form"):
             ["Short & crisp", "Detailed notes", "Study notes (structured)", "Job interview takeaways", "Executive brief"]
         )
 
-    colC, colD = st.columns(2)
+    colC, colD, colE = st.columns(3)
     with colC:
         show_logs = st.toggle("Show live logs", value=True)
     with colD:
         show_transcript = st.toggle("Show transcript", value=False)
+    with colE:
+        chapter_mode = st.toggle("Chapter mode", value=False, help="Summarize each YouTube chapter separately")
 
     submitted = st.form_submit_button("✨ Generate Summary")
 
@@ -647,9 +1488,21 @@ def render_timeline(active_step: int):
     st.markdown(f'<div class="timeline">{"".join(chips)}</div>', unsafe_allow_html=True)
 
 
+def request_retry():
+    st.session_state.retry_requested = True
+
+
 # ============================================================
 # Run summarization
 # ============================================================
+# "Retry from summarization" re-runs the last failed job from its checkpoint
+if st.session_state.pop("retry_requested", False) and st.session_state.get("retry_run"):
+    retry_run = st.session_state.retry_run
+    yt_url, prefer_lang, style = retry_run["url"], retry_run["lang"], retry_run["style"]
+    chapter_mode = retry_run.get("chapter_mode", chapter_mode)
+    vid = get_yt_id(yt_url)
+    submitted = True
+
 if submitted:
     if not yt_url.strip():
         st.error("❌ Please enter a valid YouTube URL.")
@@ -660,47 +1513,86 @@ if submitted:
         st.stop()
 
     st.session_state.logs = []
+    st.session_state.retry_run = None
     t0 = time.time()
 
-    # Progress containers
-    st.markdown("### ⚡ Live Workflow")
-    progress_bar = st.progress(0)
-
-    # STEP 1 - Extracting
-    render_timeline(active_step=0)
-    animate_progress(progress_bar, 0, 25, duration=0.8)
-
-    with st.spinner("📥 Extracting captions..."):
-        try:
-            meta = extract_transcript(yt_url, prefer_lang=prefer_lang, log_box=log_box)
-        except Exception as e:
-            ui_log(log_box, f"❌ Captions extraction failed: {e}")
-            st.error(f"❌ Captions extraction failed: {e}")
-            st.stop()
-
-    # STEP 2 - Cleaning
-    render_timeline(active_step=1)
-    animate_progress(progress_bar, 25, 55, duration=0.8)
-    ui_log(log_box, "🧼 Cleaning transcript...")
-    cleaned_transcript = clean_transcript(meta["raw_transcript"])
-
-    # STEP 3 - Summarizing
-    render_timeline(active_step=2)
-    animate_progress(progress_bar, 55, 90, duration=1.0)
-
-    with st.spinner("🧠 Generating summary..."):
-        try:
-            summary = summarize_with_groq(cleaned_transcript, meta["title"], style, log_box=log_box)
-        except Exception as e:
-            ui_log(log_box, f"❌ Summary generation failed: {e}")
-            st.error(f"❌ Summary generation failed: {e}")
-            st.stop()
-
-    # STEP 4 - Done
-    animate_progress(progress_bar, 90, 100, duration=0.6)
-    render_timeline(active_step=3)
-
-    took = time.time() - t0
+    run_id = make_run_id(yt_url, prefer_lang)
+    checkpoint = load_checkpoint(run_id)
+
+    with trace_span("pipeline.run", video_id=vid or "", style=style, prefer_lang=prefer_lang) as run_span, \
+            profile_run(vid or "run"):
+        # Progress containers
+        st.markdown("### ⚡ Live Workflow")
+        progress_bar = st.progress(0)
+
+        # STEP 1 - Extracting
+        render_timeline(active_step=0)
+        animate_progress(progress_bar, 0, 25, duration=0.8)
+
+        if checkpoint.get("metadata") and "raw_transcript" in checkpoint:
+            ui_log(log_box, "♻️ Resuming: captions loaded from checkpoint.")
+            meta = dict(checkpoint["metadata"], raw_transcript=checkpoint["raw_transcript"])
+            run_span["resumed_from"] = "cleaning"
+        else:
+            with st.spinner("📥 Extracting captions..."):
+                try:
+                    meta = extract_transcript(yt_url, prefer_lang=prefer_lang, log_box=log_box)
+                except Exception as e:
+                    ui_log(log_box, f"❌ Captions extraction failed: {e}")
+                    st.error(f"❌ Captions extraction failed: {e}")
+                    st.stop()
+
+            save_checkpoint(
+                run_id,
+                metadata={k: v for k, v in meta.items() if k != "raw_transcript"},
+                raw_transcript=meta["raw_transcript"],
+            )
+
+        # STEP 2 - Cleaning
+        render_timeline(active_step=1)
+        animate_progress(progress_bar, 25, 55, duration=0.8)
+        if "cleaned_transcript" in checkpoint:
+            cleaned_transcript = checkpoint["cleaned_transcript"]
+            run_span["resumed_from"] = "summarization"
+        else:
+            ui_log(log_box, "🧼 Cleaning transcript...")
+            with trace_span("clean_transcript", raw_chars=len(meta["raw_transcript"])) as clean_span:
+                cleaned_transcript = clean_transcript(meta["raw_transcript"])
+                clean_span["cleaned_chars"] = len(cleaned_transcript)
+            save_checkpoint(run_id, cleaned_transcript=cleaned_transcript)
+
+        # STEP 3 - Summarizing
+        render_timeline(active_step=2)
+        animate_progress(progress_bar, 55, 90, duration=1.0)
+
+        with st.spinner("🧠 Generating summary..."):
+            try:
+                chapters = split_by_chapters(meta.get("segments") or [], meta.get("chapters") or []) \
+                    if chapter_mode else []
+                if chapter_mode and not chapters:
+                    ui_log(log_box, "ℹ️ No chapters found for this video. Summarizing the full transcript.")
+                run_span["chapters"] = len(chapters)
+
+                if chapters:
+                    summary = summarize_chapters(chapters, meta["title"], meta.get("video_id") or vid,
+                                                 style, log_box=log_box)
+                else:
+                    summary = summarize_with_groq(cleaned_transcript, meta["title"], style, log_box=log_box)
+            except Exception as e:
+                ui_log(log_box, f"❌ Summary generation failed: {e}")
+                st.error(f"❌ Summary generation failed: {e}")
+                # captions are checkpointed, so a retry skips straight to the model call
+                st.session_state.retry_run = {"url": yt_url, "lang": prefer_lang, "style": style,
+                                              "chapter_mode": chapter_mode}
+                st.button("🔁 Retry from summarization", on_click=request_retry)
+                st.stop()
+
+        # STEP 4 - Done
+        animate_progress(progress_bar, 90, 100, duration=0.6)
+        render_timeline(active_step=3)
+
+        took = time.time() - t0
+        run_span.update(transcript_chars=len(cleaned_transcript), time_taken=round(took, 3))
 
     # ✅ Save to history (permanent)
     st.session_state.history.append({
@@ -711,10 +1603,12 @@ if submitted:
         "transcript": cleaned_transcript,
         "lang": meta["lang"],
         "subs_type": meta["subs_type"],
+        "style": style,
         "ts": time.strftime("%Y-%m-%d %H:%M"),
         "time_taken": took,
     })
     save_history(st.session_state.history)
+    clear_checkpoint(run_id)
     st.toast("✅ Saved in history!", icon="📌")
 
     # ============================================================